@@ -1,5 +1,7 @@
+import asyncio
 import logging
 from datetime import timedelta
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -8,6 +10,7 @@ from telegram.ext import (
     Application,
     CallbackQueryHandler,
     CommandHandler,
+    ContextTypes,
     MessageHandler,
     filters,
 )
@@ -31,10 +34,13 @@ from .repositories import RecordRepository, UserRepository
 from .services import Services
 from .session import SessionManager
 from .stats import StatsService
+from .timezones import TIMEZONE_LABEL_BY_IANA
+from .utils import get_zoneinfo
 
 
 def build_application(settings: Settings) -> Application:
     _ensure_db_dir(settings.db_path)
+    _warm_timezones()
     db = Database(settings.db_path)
     users = UserRepository(db)
     records = RecordRepository(db)
@@ -42,24 +48,48 @@ def build_application(settings: Settings) -> Application:
     stats = StatsService(records)
     services = Services(users=users, records=records, sessions=sessions, stats=stats)
 
-    request = HTTPXRequest(connect_timeout=10.0, read_timeout=60.0, write_timeout=60.0)
-    application = Application.builder().token(settings.bot_token).request(request).build()
-    application.bot_data["services"] = services
+    request = HTTPXRequest(
+        connection_pool_size=32,
+        connect_timeout=5.0,
+        read_timeout=60.0,
+        write_timeout=20.0,
+        pool_timeout=5.0,
+        http_version="2",
+    )
+    application = (
+        Application.builder()
+        .token(settings.bot_token)
+        .request(request)
+        .concurrent_updates(64)
+        .post_shutdown(partial(_close_database, db=db))
+        .build()
+    )
 
-    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("start", partial(start, services=services)))
     application.add_handler(CommandHandler("timezone", timezone))
-    application.add_handler(CommandHandler("do", do))
-    application.add_handler(CommandHandler("me", me))
-    application.add_handler(CommandHandler("week", week))
-    application.add_handler(CommandHandler("month", month))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, profile_input))
-    application.add_handler(CallbackQueryHandler(callback))
+    application.add_handler(CommandHandler("do", partial(do, services=services)))
+    application.add_handler(CommandHandler("me", partial(me, services=services)))
+    application.add_handler(CommandHandler("week", partial(week, services=services)))
+    application.add_handler(CommandHandler("month", partial(month, services=services)))
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & ~filters.COMMAND, partial(profile_input, services=services)
+        )
+    )
+    application.add_handler(CallbackQueryHandler(partial(callback, services=services)))
     application.add_error_handler(error_handler)
 
     interval = settings.session_cleanup_minutes * 60
     if application.job_queue:
         application.job_queue.run_repeating(
-            cleanup_sessions, interval=interval, first=interval
+            partial(cleanup_sessions, services=services),
+            interval=interval,
+            first=interval,
+        )
+        application.job_queue.run_repeating(
+            partial(_checkpoint_database, db=db),
+            interval=interval,
+            first=interval,
         )
     return application
 
@@ -74,7 +104,27 @@ def main() -> None:
     load_dotenv()
     settings = Settings.from_env()
     application = build_application(settings)
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    application.run_polling(
+        allowed_updates=Update.ALL_TYPES,
+        timeout=50,
+        poll_interval=0.0,
+        bootstrap_retries=-1,
+    )
+
+
+async def _close_database(application: Application, *, db: Database) -> None:
+    db.close()
+
+
+async def _checkpoint_database(
+    context: ContextTypes.DEFAULT_TYPE, *, db: Database
+) -> None:
+    await asyncio.to_thread(db.checkpoint)
+
+
+def _warm_timezones() -> None:
+    for name in TIMEZONE_LABEL_BY_IANA:
+        get_zoneinfo(name)
 
 
 def _ensure_db_dir(db_path: Path) -> None:
@@ -2,6 +2,8 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
+DEFAULT_DB_PATH = Path("data/onani_memo.db")
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -12,13 +14,15 @@ class Settings:
 
     @classmethod
     def from_env(cls) -> "Settings":
-        bot_token = os.getenv("BOT_TOKEN") or os.getenv("TELEGRAM_BOT_TOKEN")
+        env = os.environ
+        bot_token = env.get("BOT_TOKEN") or env.get("TELEGRAM_BOT_TOKEN")
         if not bot_token:
             raise RuntimeError("Missing BOT_TOKEN or TELEGRAM_BOT_TOKEN.")
 
-        db_path = Path(os.getenv("ONANI_DB_PATH", "data/onani_memo.db"))
-        session_ttl_minutes = int(os.getenv("SESSION_TTL_MINUTES", "30"))
-        session_cleanup_minutes = int(os.getenv("SESSION_CLEANUP_MINUTES", "5"))
+        db_path_raw = env.get("ONANI_DB_PATH")
+        db_path = Path(db_path_raw) if db_path_raw is not None else DEFAULT_DB_PATH
+        session_ttl_minutes = int(env.get("SESSION_TTL_MINUTES", "30"))
+        session_cleanup_minutes = int(env.get("SESSION_CLEANUP_MINUTES", "5"))
         return cls(
             bot_token=bot_token,
             db_path=db_path,
@@ -1,74 +1,117 @@
 import sqlite3
+from collections.abc import Mapping
+from datetime import datetime
+from enum import StrEnum
 from pathlib import Path
-from threading import Lock
+from threading import Lock, local
 
-SCHEMA_VERSION = 2
+from .enums import DURATION_CODE_IDS, VISCOSITY_CODE_IDS, VOLUME_CODE_IDS
+
+SCHEMA_VERSION = 4
+
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_converter(
+    "timestamp", lambda value: datetime.fromisoformat(value.decode())
+)
 
 
 class Database:
     def __init__(self, path: Path) -> None:
         self._path = path
-        self._lock = Lock()
-        self._conn = sqlite3.connect(self._path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA foreign_keys = ON;")
-        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._write_lock = Lock()
+        self._write_conn = self._connect()
+        self._write_conn.execute("PRAGMA journal_mode = WAL;")
+        self._readers = local()
+        self._read_conns: list[sqlite3.Connection] = []
+        self._read_conns_lock = Lock()
         self._ensure_schema()
 
     def close(self) -> None:
-        self._conn.close()
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+        self._readers = local()
+        with self._write_lock:
+            self._write_conn.execute("PRAGMA analysis_limit = 400;")
+            self._write_conn.execute("ANALYZE records;")
+            self._write_conn.close()
+
+    def checkpoint(self) -> None:
+        with self._write_lock:
+            self._write_conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
 
     def execute(self, sql: str, params: tuple[object, ...] = ()) -> sqlite3.Cursor:
-        with self._lock:
-            cur = self._conn.execute(sql, params)
-            self._conn.commit()
+        with self._write_lock:
+            cur = self._write_conn.execute(sql, params)
+            self._write_conn.commit()
             return cur
 
     def fetchone(
         self, sql: str, params: tuple[object, ...] = ()
     ) -> sqlite3.Row | None:
-        with self._lock:
-            cur = self._conn.execute(sql, params)
-            return cur.fetchone()
+        return self._read_conn().execute(sql, params).fetchone()
 
     def fetchall(
         self, sql: str, params: tuple[object, ...] = ()
     ) -> list[sqlite3.Row]:
-        with self._lock:
-            cur = self._conn.execute(sql, params)
-            return cur.fetchall()
+        return self._read_conn().execute(sql, params).fetchall()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            detect_types=sqlite3.PARSE_COLNAMES,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -20000;")
+        conn.execute("PRAGMA mmap_size = 268435456;")
+        return conn
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = ON;")
+            self._readers.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
 
     def _ensure_schema(self) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._write_lock:
+            self._write_conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS schema_meta (
                   version INTEGER NOT NULL
                 );
                 """
             )
-            row = self._conn.execute(
+            row = self._write_conn.execute(
                 "SELECT version FROM schema_meta LIMIT 1;"
             ).fetchone()
             if row is None:
-                self._apply_schema_v2()
-                self._conn.execute(
+                self._apply_schema_v4()
+                self._write_conn.execute(
                     "INSERT INTO schema_meta (version) VALUES (?);",
                     (SCHEMA_VERSION,),
                 )
-            elif row["version"] == 1 and SCHEMA_VERSION == 2:
-                self._migrate_v1_to_v2()
-                self._conn.execute("UPDATE schema_meta SET version = ?;", (SCHEMA_VERSION,))
-            elif row["version"] == 2 and SCHEMA_VERSION == 2:
-                self._ensure_user_columns()
+            elif 1 <= row["version"] < SCHEMA_VERSION:
+                self._migrate(row["version"])
+                self._write_conn.execute("UPDATE schema_meta SET version = ?;", (SCHEMA_VERSION,))
             elif row["version"] != SCHEMA_VERSION:
                 raise RuntimeError(
                     f"Unsupported schema version {row['version']}, expected {SCHEMA_VERSION}."
                 )
-            self._conn.commit()
+            self._write_conn.commit()
 
-    def _apply_schema_v2(self) -> None:
-        self._conn.executescript(
+    def _apply_schema_v4(self) -> None:
+        self._write_conn.executescript(
             """
             CREATE TABLE IF NOT EXISTS users (
               user_id         INTEGER PRIMARY KEY,
@@ -87,7 +130,46 @@ class Database:
               id               INTEGER PRIMARY KEY AUTOINCREMENT,
               user_id          INTEGER NOT NULL,
 
-              timestamp_utc    TEXT NOT NULL,
+              timestamp_utc    INTEGER NOT NULL,
+              timezone         TEXT NOT NULL,
+              timestamp_local  TEXT NOT NULL,
+
+              rating           INTEGER NOT NULL,
+              duration_code    INTEGER NOT NULL,
+              volume_code      INTEGER NOT NULL,
+              viscosity_code   INTEGER NOT NULL,
+
+              created_at_utc   TEXT NOT NULL,
+
+              FOREIGN KEY(user_id) REFERENCES users(user_id)
+            );
+            """
+        )
+        self._ensure_record_indexes()
+
+    def _migrate(self, version: int) -> None:
+        if version < 2:
+            self._migrate_v1_to_v2()
+        else:
+            self._ensure_user_columns()
+        if version < 3:
+            self._migrate_v2_to_v3()
+        if version < 4:
+            self._migrate_v3_to_v4()
+
+    def _migrate_v1_to_v2(self) -> None:
+        self._ensure_user_columns()
+
+    def _migrate_v2_to_v3(self) -> None:
+        self._write_conn.executescript(
+            """
+            BEGIN;
+
+            CREATE TABLE records_v3 (
+              id               INTEGER PRIMARY KEY AUTOINCREMENT,
+              user_id          INTEGER NOT NULL,
+
+              timestamp_utc    INTEGER NOT NULL,
               timezone         TEXT NOT NULL,
               timestamp_local  TEXT NOT NULL,
 
@@ -101,23 +183,134 @@ class Database:
               FOREIGN KEY(user_id) REFERENCES users(user_id)
             );
 
-            CREATE INDEX IF NOT EXISTS idx_records_user_time
-              ON records(user_id, timestamp_utc);
+            INSERT INTO records_v3 (
+              id,
+              user_id,
+              timestamp_utc,
+              timezone,
+              timestamp_local,
+              rating,
+              duration_code,
+              volume_code,
+              viscosity_code,
+              created_at_utc
+            )
+            SELECT
+              id,
+              user_id,
+              CAST(strftime('%s', timestamp_utc) AS INTEGER),
+              timezone,
+              timestamp_local,
+              rating,
+              duration_code,
+              volume_code,
+              viscosity_code,
+              created_at_utc
+            FROM records;
+
+            DELETE FROM sqlite_sequence WHERE name = 'records_v3';
+            UPDATE sqlite_sequence SET name = 'records_v3' WHERE name = 'records';
+
+            DROP TABLE records;
+            ALTER TABLE records_v3 RENAME TO records;
+
+            UPDATE schema_meta SET version = 3;
+
+            COMMIT;
             """
         )
+        self._ensure_record_indexes()
 
-    def _migrate_v1_to_v2(self) -> None:
-        self._ensure_user_columns()
+    def _migrate_v3_to_v4(self) -> None:
+        duration = _code_id_case("duration_code", DURATION_CODE_IDS)
+        volume = _code_id_case("volume_code", VOLUME_CODE_IDS)
+        viscosity = _code_id_case("viscosity_code", VISCOSITY_CODE_IDS)
+        self._write_conn.executescript(
+            f"""
+            BEGIN;
+
+            CREATE TABLE records_v4 (
+              id               INTEGER PRIMARY KEY AUTOINCREMENT,
+              user_id          INTEGER NOT NULL,
+
+              timestamp_utc    INTEGER NOT NULL,
+              timezone         TEXT NOT NULL,
+              timestamp_local  TEXT NOT NULL,
+
+              rating           INTEGER NOT NULL,
+              duration_code    INTEGER NOT NULL,
+              volume_code      INTEGER NOT NULL,
+              viscosity_code   INTEGER NOT NULL,
+
+              created_at_utc   TEXT NOT NULL,
+
+              FOREIGN KEY(user_id) REFERENCES users(user_id)
+            );
+
+            INSERT INTO records_v4 (
+              id,
+              user_id,
+              timestamp_utc,
+              timezone,
+              timestamp_local,
+              rating,
+              duration_code,
+              volume_code,
+              viscosity_code,
+              created_at_utc
+            )
+            SELECT
+              id,
+              user_id,
+              timestamp_utc,
+              timezone,
+              timestamp_local,
+              rating,
+              {duration},
+              {volume},
+              {viscosity},
+              created_at_utc
+            FROM records;
+
+            DELETE FROM sqlite_sequence WHERE name = 'records_v4';
+            UPDATE sqlite_sequence SET name = 'records_v4' WHERE name = 'records';
+
+            DROP TABLE records;
+            ALTER TABLE records_v4 RENAME TO records;
+
+            UPDATE schema_meta SET version = 4;
+
+            COMMIT;
+            """
+        )
+        self._ensure_record_indexes()
 
     def _ensure_user_columns(self) -> None:
         columns = {
-            row["name"] for row in self._conn.execute("PRAGMA table_info(users);")
+            row["name"] for row in self._write_conn.execute("PRAGMA table_info(users);")
         }
         if "nickname" not in columns:
-            self._conn.execute("ALTER TABLE users ADD COLUMN nickname TEXT;")
+            self._write_conn.execute("ALTER TABLE users ADD COLUMN nickname TEXT;")
         if "height_cm" not in columns:
-            self._conn.execute("ALTER TABLE users ADD COLUMN height_cm INTEGER;")
+            self._write_conn.execute("ALTER TABLE users ADD COLUMN height_cm INTEGER;")
         if "weight_kg" not in columns:
-            self._conn.execute("ALTER TABLE users ADD COLUMN weight_kg REAL;")
+            self._write_conn.execute("ALTER TABLE users ADD COLUMN weight_kg REAL;")
         if "birthday" not in columns:
-            self._conn.execute("ALTER TABLE users ADD COLUMN birthday TEXT;")
+            self._write_conn.execute("ALTER TABLE users ADD COLUMN birthday TEXT;")
+
+    def _ensure_record_indexes(self) -> None:
+        self._write_conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_records_user_time_cov
+              ON records(user_id, timestamp_utc, timestamp_local);
+
+            DROP INDEX IF EXISTS idx_records_user_time;
+            """
+        )
+
+
+def _code_id_case(column: str, code_ids: Mapping[StrEnum, int]) -> str:
+    whens = " ".join(
+        f"WHEN '{code.value}' THEN {code_id}" for code, code_id in code_ids.items()
+    )
+    return f"CASE {column} {whens} END"
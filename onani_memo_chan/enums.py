@@ -36,3 +36,26 @@ class ViscosityCode(StrEnum):
     V3 = "V3"
     V4 = "V4"
     V5 = "V5"
+
+
+DURATION_CODE_IDS: dict[DurationCode, int] = {
+    DurationCode.LE5: 0,
+    DurationCode.LE10: 1,
+    DurationCode.LE30: 2,
+    DurationCode.LE60: 3,
+    DurationCode.GT60: 4,
+}
+
+VOLUME_CODE_IDS: dict[VolumeCode, int] = {
+    VolumeCode.LOW: 0,
+    VolumeCode.MID: 1,
+    VolumeCode.HIGH: 2,
+}
+
+VISCOSITY_CODE_IDS: dict[ViscosityCode, int] = {
+    ViscosityCode.V1: 0,
+    ViscosityCode.V2: 1,
+    ViscosityCode.V3: 2,
+    ViscosityCode.V4: 3,
+    ViscosityCode.V5: 4,
+}
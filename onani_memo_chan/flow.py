@@ -5,7 +5,7 @@ from .enums import Action, DurationCode, Step, ViscosityCode, VolumeCode
 from .session import Session
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StepTransition:
     session: Session
     next_step: Step | None
@@ -13,30 +13,32 @@ class StepTransition:
 
 ActionHandler = Callable[[Session, str], StepTransition]
 
+_RATING_BY_VALUE = {str(n): n for n in range(1, 6)}
+_DURATION_BY_VALUE = {code.value: code for code in DurationCode}
+_VOLUME_BY_VALUE = {code.value: code for code in VolumeCode}
+_VISCOSITY_BY_VALUE = {code.value: code for code in ViscosityCode}
+
 
 def _handle_rating(session: Session, value: str) -> StepTransition:
-    rating = int(value)
-    if rating < 1 or rating > 5:
-        raise ValueError("rating out of range")
-    session.rating = rating
+    session.rating = _RATING_BY_VALUE[value]
     session.step = Step.DURATION
     return StepTransition(session=session, next_step=Step.DURATION)
 
 
 def _handle_duration(session: Session, value: str) -> StepTransition:
-    session.duration_code = DurationCode(value)
+    session.duration_code = _DURATION_BY_VALUE[value]
     session.step = Step.VOLUME
     return StepTransition(session=session, next_step=Step.VOLUME)
 
 
 def _handle_volume(session: Session, value: str) -> StepTransition:
-    session.volume_code = VolumeCode(value)
+    session.volume_code = _VOLUME_BY_VALUE[value]
     session.step = Step.VISCOSITY
     return StepTransition(session=session, next_step=Step.VISCOSITY)
 
 
 def _handle_viscosity(session: Session, value: str) -> StepTransition:
-    session.viscosity_code = ViscosityCode(value)
+    session.viscosity_code = _VISCOSITY_BY_VALUE[value]
     return StepTransition(session=session, next_step=None)
 
 
@@ -49,5 +51,4 @@ ACTION_HANDLERS: dict[Action, ActionHandler] = {
 
 
 def apply_action(session: Session, action: Action, value: str) -> StepTransition:
-    handler = ACTION_HANDLERS[action]
-    return handler(session, value)
+    return ACTION_HANDLERS[action](session, value)
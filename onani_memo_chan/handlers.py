@@ -1,9 +1,12 @@
+import asyncio
 import logging
+import re
+from collections.abc import Awaitable, Callable
 from contextlib import suppress
 from datetime import UTC, date, datetime
-from zoneinfo import ZoneInfo
+from typing import Any
 
-from telegram import Update
+from telegram import Message, Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
@@ -21,12 +24,13 @@ from .ui import (
     build_step_view,
     build_timezone_keyboard,
     build_undo_keyboard,
+    format_help_message,
     format_profile_message,
     format_record_confirmation,
     format_stats_message,
     format_timezone_label,
 )
-from .utils import utc_now
+from .utils import get_zoneinfo, utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -36,14 +40,27 @@ PROFILE_EDIT_WEIGHT = "weight_kg"
 PROFILE_EDIT_BIRTHDAY = "birthday"
 PROFILE_EDIT_NICKNAME = "nickname"
 
+UNSET_TEXT = "未设置"
 
-def _services(context: ContextTypes.DEFAULT_TYPE) -> Services:
-    return context.application.bot_data["services"]
+CallbackRoute = Callable[
+    [Any, ContextTypes.DEFAULT_TYPE, Services, str], Awaitable[None]
+]
+
+_HEIGHT_RE = re.compile(r"\s*(\d{2,3})\s*(?:cm)?\s*", re.IGNORECASE)
+_WEIGHT_RE = re.compile(r"\s*(\d+(?:\.\d*)?)\s*(?:kg)?\s*", re.IGNORECASE)
+
+_ACTION_BY_VALUE = {action.value: action for action in Action}
+
+_EXPECTED_ACTION: dict[Step, Action] = {
+    Step.RATING: Action.RATING,
+    Step.DURATION: Action.DURATION,
+    Step.VOLUME: Action.VOLUME,
+    Step.VISCOSITY: Action.VISCOSITY,
+}
 
 
 def _is_private(update: Update) -> bool:
-    chat = update.effective_chat
-    return chat is not None and chat.type == "private"
+    return getattr(update.effective_chat, "type", None) == "private"
 
 
 async def _reply_private_only(update: Update) -> None:
@@ -51,6 +68,21 @@ async def _reply_private_only(update: Update) -> None:
         await update.message.reply_text(PRIVATE_ONLY_TEXT, parse_mode=ParseMode.HTML)
 
 
+async def _begin(
+    update: Update, *, reply_if_not_private: bool = True
+) -> tuple[int, int, Message] | None:
+    if not _is_private(update):
+        if reply_if_not_private:
+            await _reply_private_only(update)
+        return None
+    user = update.effective_user
+    chat = update.effective_chat
+    message = update.message
+    if user is None or chat is None or message is None:
+        return None
+    return user.id, chat.id, message
+
+
 async def _send_timezone_prompt(update: Update, page: int | None = None) -> None:
     if update.message:
         await update.message.reply_text(
@@ -60,28 +92,18 @@ async def _send_timezone_prompt(update: Update, page: int | None = None) -> None
         )
 
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not _is_private(update):
-        await _reply_private_only(update)
-        return
-    services = _services(context)
-    if update.effective_user is None:
+async def start(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    begun = await _begin(update)
+    if begun is None:
         return
-    user_id = update.effective_user.id
-    timezone = services.users.get_timezone(user_id)
+    user_id, _, message = begun
+    timezone = await asyncio.to_thread(services.users.get_timezone, user_id)
     if timezone is None:
         await _send_timezone_prompt(update)
         return
-    help_text = (
-        "<b>欢迎回来</b>\n"
-        f"• 当前时区：{format_timezone_label(timezone)}\n"
-        "• 修改时区：/timezone\n"
-        "• 开始记录：/do\n"
-        "• 我的信息：/me\n"
-        "• 统计：/week /month"
-    )
-    if update.message:
-        await update.message.reply_text(help_text, parse_mode=ParseMode.HTML)
+    await message.reply_text(format_help_message(timezone), parse_mode=ParseMode.HTML)
 
 
 async def timezone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -91,54 +113,57 @@ async def timezone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await _send_timezone_prompt(update)
 
 
-async def do(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not _is_private(update):
-        await _reply_private_only(update)
-        return
-    services = _services(context)
-    if update.effective_user is None or update.effective_chat is None:
+async def do(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    begun = await _begin(update)
+    if begun is None:
         return
-    user_id = update.effective_user.id
-    timezone = services.users.get_timezone(user_id)
+    user_id, chat_id, message = begun
+    timezone = await asyncio.to_thread(services.users.get_timezone, user_id)
     if timezone is None:
-        if update.message:
-            await update.message.reply_text(
-                "请先设置时区后再记录：",
-                reply_markup=build_timezone_keyboard(),
-                parse_mode=ParseMode.HTML,
-            )
-        return
-    if update.message is None:
+        await message.reply_text(
+            "请先设置时区后再记录：",
+            reply_markup=build_timezone_keyboard(),
+            parse_mode=ParseMode.HTML,
+        )
         return
-    session = services.sessions.create(user_id, update.effective_chat.id)
+    session = services.sessions.create(user_id, chat_id, timezone=timezone)
     view = build_step_view(session)
-    message = await update.message.reply_text(
+    sent = await message.reply_text(
         view.text, reply_markup=view.reply_markup, parse_mode=ParseMode.HTML
     )
-    session.message_id = message.message_id
+    session.message_id = sent.message_id
 
 
-async def week(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await _send_stats(update, context, 7)
+async def week(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    await _send_stats(update, services, 7)
 
 
-async def month(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await _send_stats(update, context, 30)
+async def month(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    await _send_stats(update, services, 30)
 
 
-async def me(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not _is_private(update):
-        await _reply_private_only(update)
+async def me(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    if await _begin(update) is None:
         return
-    await _reply_profile(update, context, build_profile_keyboard())
+    await _reply_profile(update, services, build_profile_keyboard())
 
 
-async def profile_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not _is_private(update):
-        return
-    if update.message is None or update.message.text is None:
+async def profile_input(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
+    begun = await _begin(update, reply_if_not_private=False)
+    if begun is None:
         return
-    if update.effective_user is None:
+    user_id, _, message = begun
+    if message.text is None:
         return
     user_data = context.user_data
     if user_data is None:
@@ -146,85 +171,76 @@ async def profile_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     field = user_data.get(PROFILE_EDIT_KEY)
     if field is None:
         return
-    text = update.message.text.strip()
+    text = message.text.strip()
     if not text:
         return
     if text.lower() == "q!":
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text("已取消修改。")
-        await _reply_profile(update, context, build_profile_keyboard())
+        await message.reply_text("已取消修改。")
+        await _reply_profile(update, services, build_profile_keyboard())
         return
     if text.startswith("/"):
         return
-    services = _services(context)
-    user_id = update.effective_user.id
-    profile = services.users.get_profile(user_id)
+    profile = await asyncio.to_thread(services.users.get_profile, user_id)
     if profile is None:
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text(
+        await message.reply_text(
             "请先设置时区后再修改资料：",
             reply_markup=build_timezone_keyboard(),
             parse_mode=ParseMode.HTML,
         )
         return
-    now_utc = utc_now()
     if field == PROFILE_EDIT_HEIGHT:
         height_cm = _parse_height(text)
         if height_cm is None:
-            await update.message.reply_text("身高请输入 50-250 的整数（cm），例如 175。发送 q! 取消。")
+            await message.reply_text("身高请输入 50-250 的整数（cm），例如 175。发送 q! 取消。")
             return
-        services.users.update_height_cm(user_id, height_cm, now_utc)
+        await asyncio.to_thread(services.users.update_height_cm, user_id, height_cm)
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text("已更新身高。")
-        await _reply_profile(update, context, build_profile_keyboard())
+        await message.reply_text("已更新身高。")
+        await _reply_profile(update, services, build_profile_keyboard())
         return
     if field == PROFILE_EDIT_WEIGHT:
         weight_kg = _parse_weight(text)
         if weight_kg is None:
-            await update.message.reply_text("体重请输入 20-200 的数字（kg），例如 70.5。发送 q! 取消。")
+            await message.reply_text("体重请输入 20-200 的数字（kg），例如 70.5。发送 q! 取消。")
             return
-        services.users.update_weight_kg(user_id, weight_kg, now_utc)
+        await asyncio.to_thread(services.users.update_weight_kg, user_id, weight_kg)
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text("已更新体重。")
-        await _reply_profile(update, context, build_profile_keyboard())
+        await message.reply_text("已更新体重。")
+        await _reply_profile(update, services, build_profile_keyboard())
         return
     if field == PROFILE_EDIT_BIRTHDAY:
         birthday = _parse_birthday(text)
         if birthday is None:
-            await update.message.reply_text("生日请输入 YYYY-MM-DD，且不能是未来日期。发送 q! 取消。")
+            await message.reply_text("生日请输入 YYYY-MM-DD，且不能是未来日期。发送 q! 取消。")
             return
-        services.users.update_birthday(user_id, birthday, now_utc)
+        await asyncio.to_thread(services.users.update_birthday, user_id, birthday)
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text("已更新生日。")
-        await _reply_profile(update, context, build_profile_keyboard())
+        await message.reply_text("已更新生日。")
+        await _reply_profile(update, services, build_profile_keyboard())
         return
     if field == PROFILE_EDIT_NICKNAME:
         nickname = _parse_nickname(text)
         if nickname is None:
-            await update.message.reply_text("昵称不能为空且不超过 32 个字符。发送 q! 取消。")
+            await message.reply_text("昵称不能为空且不超过 32 个字符。发送 q! 取消。")
             return
-        services.users.update_nickname(user_id, nickname, now_utc)
+        await asyncio.to_thread(services.users.update_nickname, user_id, nickname)
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await update.message.reply_text("已更新昵称。")
-        await _reply_profile(update, context, build_profile_keyboard())
+        await message.reply_text("已更新昵称。")
+        await _reply_profile(update, services, build_profile_keyboard())
         return
 
 
-async def _send_stats(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, days: int
-) -> None:
-    if not _is_private(update):
-        await _reply_private_only(update)
-        return
-    services = _services(context)
-    if update.effective_user is None:
+async def _send_stats(update: Update, services: Services, days: int) -> None:
+    begun = await _begin(update)
+    if begun is None:
         return
-    user_id = update.effective_user.id
-    summary = services.stats.build_summary(user_id, days)
+    user_id, _, message = begun
+    summary = await asyncio.to_thread(services.stats.build_summary, user_id, days)
     if summary.total == 0:
         text = f"<b>统计</b>\n• 最近 {days} 天没有可用记录（撤销/删除的不计入）。"
-        if update.message:
-            await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+        await message.reply_text(text, parse_mode=ParseMode.HTML)
         return
     title = f"最近{days}天统计"
     text = format_stats_message(
@@ -236,86 +252,77 @@ async def _send_stats(
         avg_interval=summary.avg_interval,
         last_ago=summary.last_ago,
     )
-    if update.message:
-        await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+    await message.reply_text(text, parse_mode=ParseMode.HTML)
 
 
-async def callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
     query = update.callback_query
     if query is None or query.data is None:
         return
-    data = query.data
-    if data.startswith("tz:"):
-        await _handle_timezone_selection(query, context, data)
+    prefix, _, value = query.data.partition(":")
+    route = _CALLBACK_ROUTES.get(prefix)
+    if route is None:
+        await _handle_session_action(query, services, prefix, value)
         return
-    if data.startswith("tzp:"):
-        await _handle_timezone_page(query, data)
+    if not value and prefix != "tzc":
         return
-    if data == "tzc":
-        await _handle_timezone_cancel(query)
-        return
-    if data.startswith("me:"):
-        await _handle_profile_action(query, context, data)
-        return
-    if data.startswith("x:"):
-        await _handle_session_cancel(query, context, data)
-        return
-    await _handle_session_action(query, context, data)
+    await route(query, context, services, value)
 
 
 async def _handle_timezone_selection(
-    query, context: ContextTypes.DEFAULT_TYPE, data: str
+    query, context: ContextTypes.DEFAULT_TYPE, services: Services, timezone: str
 ) -> None:
     await query.answer()
-    services = _services(context)
     if query.from_user is None:
         return
     user_id = query.from_user.id
-    timezone = data.split(":", 1)[1]
     nickname = _build_display_name(query.from_user)
-    services.users.upsert_timezone(user_id, timezone, utc_now(), nickname)
+    await asyncio.to_thread(services.users.upsert_timezone, user_id, timezone, nickname)
     await query.edit_message_text(
         f"已设置时区：{format_timezone_label(timezone)}",
         parse_mode=ParseMode.HTML,
     )
 
 
-async def _handle_timezone_page(query, data: str) -> None:
-    await query.answer()
-    page_raw = data.split(":", 1)[1]
+async def _handle_timezone_page(
+    query, context: ContextTypes.DEFAULT_TYPE, services: Services, page_raw: str
+) -> None:
     try:
         page = int(page_raw)
     except ValueError:
         page = None
-    await query.edit_message_text(
+    await _answer_and_edit(
+        query,
         TIMEZONE_PROMPT,
         reply_markup=build_timezone_keyboard(page),
         parse_mode=ParseMode.HTML,
     )
 
 
-async def _handle_timezone_cancel(query) -> None:
-    await query.answer()
-    await query.edit_message_text(
-        "已取消修改时区，保持原设置。", parse_mode=ParseMode.HTML
+async def _handle_timezone_cancel(
+    query, context: ContextTypes.DEFAULT_TYPE, services: Services, value: str
+) -> None:
+    await _answer_and_edit(
+        query, "已取消修改时区，保持原设置。", parse_mode=ParseMode.HTML
     )
 
 
 async def _handle_profile_action(
-    query, context: ContextTypes.DEFAULT_TYPE, data: str
+    query, context: ContextTypes.DEFAULT_TYPE, services: Services, action: str
 ) -> None:
     await query.answer()
     user_data = context.user_data
     if user_data is None:
         return
-    action = data.split(":", 1)[1]
     if action == "edit":
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await _edit_profile(query, context, build_profile_edit_keyboard())
+        await _edit_profile(query, services, build_profile_edit_keyboard())
         return
     if action == "back":
         user_data.pop(PROFILE_EDIT_KEY, None)
-        await _edit_profile(query, context, build_profile_keyboard())
+        await _edit_profile(query, services, build_profile_keyboard())
         return
     if query.from_user is None:
         return
@@ -339,16 +346,13 @@ async def _handle_profile_action(
 
 
 async def _handle_session_action(
-    query, context: ContextTypes.DEFAULT_TYPE, data: str
+    query, services: Services, action_raw: str, payload: str
 ) -> None:
-    services = _services(context)
-    parts = data.split(":", 2)
-    if len(parts) != 3:
+    session_id, sep, value = payload.partition(":")
+    if not sep:
         return
-    action_raw, session_id, value = parts
-    try:
-        action = Action(action_raw)
-    except ValueError:
+    action = _ACTION_BY_VALUE.get(action_raw)
+    if action is None:
         await query.answer()
         return
 
@@ -360,10 +364,13 @@ async def _handle_session_action(
     if session is None:
         await query.answer(SESSION_EXPIRED_TEXT, show_alert=True)
         return
+    if query.from_user is None or query.from_user.id != session.user_id:
+        await query.answer()
+        return
     if session.finalizing:
         await query.answer(SESSION_DONE_TEXT, show_alert=True)
         return
-    if _expected_action(session.step) != action:
+    if _EXPECTED_ACTION.get(session.step) != action:
         await query.answer()
         return
 
@@ -375,43 +382,59 @@ async def _handle_session_action(
 
     if transition.next_step is not None:
         view = build_step_view(session)
-        await query.answer()
-        await query.edit_message_text(
-            view.text, reply_markup=view.reply_markup, parse_mode=ParseMode.HTML
+        await _edit_session_message(
+            query,
+            session,
+            view.text,
+            reply_markup=view.reply_markup,
+            parse_mode=ParseMode.HTML,
         )
         return
 
     await _finalize_record(query, services, session)
 
 
-async def _handle_session_cancel(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
-    await query.answer()
-    parts = data.split(":", 1)
-    if len(parts) != 2:
-        return
-    session_id = parts[1]
-    services = _services(context)
-    services.sessions.remove(session_id)
-    await query.edit_message_text("已取消本次记录，数据未保存。", parse_mode=ParseMode.HTML)
+async def _handle_session_cancel(
+    query, context: ContextTypes.DEFAULT_TYPE, services: Services, session_id: str
+) -> None:
+    session = services.sessions.get(session_id)
+    if session is not None:
+        if query.from_user is None or query.from_user.id != session.user_id:
+            await query.answer()
+            return
+        services.sessions.remove(session_id)
+        if session.edit_task is not None:
+            session.edit_task.cancel()
+    await _answer_and_edit(query, "已取消本次记录，数据未保存。", parse_mode=ParseMode.HTML)
 
 
-def _expected_action(step: Step) -> Action:
-    return {
-        Step.RATING: Action.RATING,
-        Step.DURATION: Action.DURATION,
-        Step.VOLUME: Action.VOLUME,
-        Step.VISCOSITY: Action.VISCOSITY,
-    }[step]
+_CALLBACK_ROUTES: dict[str, CallbackRoute] = {
+    "tz": _handle_timezone_selection,
+    "tzp": _handle_timezone_page,
+    "tzc": _handle_timezone_cancel,
+    "me": _handle_profile_action,
+    "x": _handle_session_cancel,
+}
 
 
 async def _finalize_record(query, services: Services, session) -> None:
-    await query.answer()
     session.finalizing = True
+    try:
+        await _save_record(query, services, session)
+    except BaseException:
+        session.finalizing = False
+        raise
+
+
+async def _save_record(query, services: Services, session) -> None:
+    await query.answer()
     if not _session_complete(session):
         session.finalizing = False
         await query.edit_message_text("记录信息不完整，请重新 /do。", parse_mode=ParseMode.MARKDOWN)
         return
-    timezone = services.users.get_timezone(session.user_id)
+    timezone = session.timezone or await asyncio.to_thread(
+        services.users.get_timezone, session.user_id
+    )
     if timezone is None:
         session.finalizing = False
         await query.edit_message_text(
@@ -422,9 +445,10 @@ async def _finalize_record(query, services: Services, session) -> None:
         return
 
     now_utc = utc_now()
-    local_dt = now_utc.astimezone(ZoneInfo(timezone))
+    local_dt = now_utc.astimezone(get_zoneinfo(timezone))
     try:
-        record_id = services.records.insert_record(
+        record_id = await asyncio.to_thread(
+            services.records.insert_record,
             user_id=session.user_id,
             timestamp_utc=now_utc,
             timezone=timezone,
@@ -433,7 +457,6 @@ async def _finalize_record(query, services: Services, session) -> None:
             duration_code=session.duration_code,
             volume_code=session.volume_code,
             viscosity_code=session.viscosity_code,
-            created_at_utc=now_utc,
         )
     except Exception:
         session.finalizing = False
@@ -460,13 +483,36 @@ async def _handle_undo(
         return
     if query.from_user is None:
         return
-    success = services.records.soft_delete_record(record_id, query.from_user.id)
+    success = await asyncio.to_thread(
+        services.records.soft_delete_record, record_id, query.from_user.id
+    )
     if success:
         await query.edit_message_text("已删除本次记录。", parse_mode=ParseMode.HTML)
     else:
         await query.edit_message_text("删除失败或记录不存在。", parse_mode=ParseMode.HTML)
 
 
+async def _answer_and_edit(query, text: str, **kwargs: Any) -> None:
+    await asyncio.gather(query.answer(), query.edit_message_text(text, **kwargs))
+
+
+async def _edit_session_message(
+    query, session: Session, text: str, **kwargs: Any
+) -> None:
+    if session.edit_task is not None:
+        session.edit_task.cancel()
+    edit = asyncio.create_task(query.edit_message_text(text, **kwargs))
+    session.edit_task = edit
+    try:
+        results = await asyncio.gather(query.answer(), edit, return_exceptions=True)
+    finally:
+        if session.edit_task is edit:
+            session.edit_task = None
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
 async def _prompt_profile_input(query, text: str) -> None:
     if query.message:
         await query.message.reply_text(text)
@@ -474,13 +520,14 @@ async def _prompt_profile_input(query, text: str) -> None:
 
 async def _reply_profile(
     update: Update,
-    context: ContextTypes.DEFAULT_TYPE,
+    services: Services,
     reply_markup,
 ) -> None:
     if update.effective_user is None or update.message is None:
         return
-    services = _services(context)
-    text = _build_profile_message(services, update.effective_user)
+    text = await asyncio.to_thread(
+        _build_profile_message, services, update.effective_user
+    )
     if text is None:
         await update.message.reply_text(
             TIMEZONE_PROMPT,
@@ -495,13 +542,12 @@ async def _reply_profile(
 
 async def _edit_profile(
     query,
-    context: ContextTypes.DEFAULT_TYPE,
+    services: Services,
     reply_markup,
 ) -> None:
-    services = _services(context)
     if query.from_user is None:
         return
-    text = _build_profile_message(services, query.from_user)
+    text = await asyncio.to_thread(_build_profile_message, services, query.from_user)
     if text is None:
         await query.edit_message_text(
             TIMEZONE_PROMPT,
@@ -515,56 +561,48 @@ async def _edit_profile(
 
 
 def _build_profile_message(services: Services, user) -> str | None:
-    profile = services.users.get_profile(user.id)
-    if profile is None:
+    summary = services.users.get_profile_summary(user.id)
+    if summary is None:
         return None
+    profile = summary.profile
     nickname = profile.nickname
     if not nickname:
         nickname = _build_display_name(user)
-        services.users.update_nickname(user.id, nickname, utc_now())
-    total_records = services.records.count_all_records(user.id)
-    last_record = services.records.get_last_record_time(user.id)
+        services.users.update_nickname(user.id, nickname)
     timezone = profile.timezone
     return format_profile_message(
         nickname=nickname,
         height=_format_height(profile.height_cm),
         weight=_format_weight(profile.weight_kg),
         birthday=_format_birthday(profile.birthday),
-        total_records=total_records,
-        last_record=_format_datetime(last_record, timezone),
+        total_records=summary.total_records,
+        last_record=_format_datetime(summary.last_record_utc, timezone),
         started_at=_format_datetime(profile.created_at_utc, timezone),
     )
 
 
 def _build_display_name(user) -> str:
-    parts = [user.first_name, user.last_name]
-    name = " ".join(part for part in parts if part)
-    if name:
-        return name
-    if user.username:
-        return user.username
-    return str(user.id)
+    first_name = user.first_name
+    last_name = user.last_name
+    if first_name and last_name:
+        return f"{first_name} {last_name}"
+    return first_name or last_name or user.username or str(user.id)
 
 
 def _format_height(height_cm: int | None) -> str:
     if height_cm is None:
-        return "未设置"
+        return UNSET_TEXT
     return f"{height_cm} cm"
 
 
 def _format_weight(weight_kg: float | int | None) -> str:
     if weight_kg is None:
-        return "未设置"
-    weight_value = float(weight_kg)
-    if weight_value.is_integer():
-        return f"{int(weight_value)} kg"
-    return f"{weight_value:.1f} kg"
+        return UNSET_TEXT
+    return f"{weight_kg:g} kg"
 
 
 def _format_birthday(birthday: str | None) -> str:
-    if not birthday:
-        return "未设置"
-    return birthday
+    return birthday or UNSET_TEXT
 
 
 def _format_datetime(dt: datetime | None, timezone: str | None) -> str:
@@ -574,26 +612,25 @@ def _format_datetime(dt: datetime | None, timezone: str | None) -> str:
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=UTC)
         with suppress(Exception):
-            dt = dt.astimezone(ZoneInfo(timezone))
+            dt = dt.astimezone(get_zoneinfo(timezone))
     return dt.strftime("%Y-%m-%d %H:%M")
 
 
 def _parse_height(text: str) -> int | None:
-    raw = text.strip().lower().replace("cm", "").replace(" ", "")
-    if not raw.isdigit():
+    match = _HEIGHT_RE.fullmatch(text)
+    if match is None:
         return None
-    value = int(raw)
+    value = int(match.group(1))
     if value < 50 or value > 250:
         return None
     return value
 
 
 def _parse_weight(text: str) -> float | None:
-    raw = text.strip().lower().replace("kg", "").replace(" ", "")
-    try:
-        value = float(raw)
-    except ValueError:
+    match = _WEIGHT_RE.fullmatch(text)
+    if match is None:
         return None
+    value = float(match.group(1))
     if value < 20 or value > 200:
         return None
     return round(value, 1)
@@ -601,8 +638,10 @@ def _parse_weight(text: str) -> float | None:
 
 def _parse_birthday(text: str) -> str | None:
     raw = text.strip()
+    if len(raw) != 10 or raw[4] != "-" or raw[7] != "-":
+        return None
     try:
-        value = datetime.strptime(raw, "%Y-%m-%d").date()
+        value = date.fromisoformat(raw)
     except ValueError:
         return None
     if value > date.today() or value < date(1900, 1, 1):
@@ -620,18 +659,17 @@ def _parse_nickname(text: str) -> str | None:
 
 
 def _session_complete(session: Session) -> bool:
-    return all(
-        [
-            session.rating is not None,
-            session.duration_code is not None,
-            session.volume_code is not None,
-            session.viscosity_code is not None,
-        ]
+    return (
+        session.rating is not None
+        and session.duration_code is not None
+        and session.volume_code is not None
+        and session.viscosity_code is not None
     )
 
 
-async def cleanup_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
-    services = _services(context)
+async def cleanup_sessions(
+    context: ContextTypes.DEFAULT_TYPE, *, services: Services
+) -> None:
     expired = services.sessions.cleanup_expired()
     if expired:
         logger.info("Cleaned %s expired sessions.", expired)
@@ -1,7 +1,20 @@
+import sqlite3
 from dataclasses import dataclass
 from datetime import datetime
 
+from .cache import TTLCache
 from .db import Database
+from .enums import (
+    DURATION_CODE_IDS,
+    VISCOSITY_CODE_IDS,
+    VOLUME_CODE_IDS,
+    DurationCode,
+    ViscosityCode,
+    VolumeCode,
+)
+from .utils import from_epoch, to_epoch
+
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
 
 
 @dataclass(frozen=True)
@@ -16,34 +29,75 @@ class UserProfile:
     updated_at_utc: datetime
 
 
+@dataclass(frozen=True)
+class ProfileSummary:
+    profile: UserProfile
+    total_records: int
+    last_record_utc: datetime | None
+
+
+@dataclass(frozen=True)
+class RangeSummary:
+    total: int
+    first_utc: datetime | None
+    last_utc: datetime | None
+    hour_counts: dict[int, int]
+
+
 class UserRepository:
     def __init__(self, db: Database) -> None:
         self._db = db
+        self._profiles: TTLCache[int, UserProfile] = TTLCache(maxsize=4096, ttl=300)
 
     def get_timezone(self, user_id: int) -> str | None:
-        row = self._db.fetchone(
-            "SELECT timezone FROM users WHERE user_id = ?;",
-            (user_id,),
-        )
-        return row["timezone"] if row else None
+        profile = self.get_profile(user_id)
+        return profile.timezone if profile else None
 
     def upsert_timezone(
-        self, user_id: int, timezone: str, now_utc: datetime, nickname: str | None
+        self, user_id: int, timezone: str, nickname: str | None = None
     ) -> None:
-        now_iso = now_utc.isoformat()
         self._db.execute(
-            """
+            f"""
             INSERT INTO users (user_id, timezone, nickname, created_at_utc, updated_at_utc)
-            VALUES (?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, {_NOW_SQL}, {_NOW_SQL})
             ON CONFLICT(user_id) DO UPDATE SET
               timezone = excluded.timezone,
               nickname = COALESCE(users.nickname, excluded.nickname),
               updated_at_utc = excluded.updated_at_utc;
             """,
-            (user_id, timezone, nickname, now_iso, now_iso),
+            (user_id, timezone, nickname),
         )
+        self._profiles.pop(user_id)
 
     def get_profile(self, user_id: int) -> UserProfile | None:
+        profile = self._profiles.get(user_id)
+        if profile is not None:
+            return profile
+        generation = self._profiles.generation
+        row = self._db.fetchone(
+            """
+            SELECT
+              user_id,
+              nickname,
+              timezone,
+              height_cm,
+              weight_kg,
+              birthday,
+              created_at_utc AS "created_at_utc [timestamp]",
+              updated_at_utc AS "updated_at_utc [timestamp]"
+            FROM users
+            WHERE user_id = ?;
+            """,
+            (user_id,),
+        )
+        if row is None:
+            return None
+        profile = _profile_from_row(row)
+        self._profiles.set(user_id, profile, generation)
+        return profile
+
+    def get_profile_summary(self, user_id: int) -> ProfileSummary | None:
+        generation = self._profiles.generation
         row = self._db.fetchone(
             """
             SELECT
@@ -53,8 +107,12 @@ class UserRepository:
               height_cm,
               weight_kg,
               birthday,
-              created_at_utc,
-              updated_at_utc
+              created_at_utc AS "created_at_utc [timestamp]",
+              updated_at_utc AS "updated_at_utc [timestamp]",
+              (SELECT COUNT(*) FROM records WHERE records.user_id = users.user_id)
+                AS total_records,
+              (SELECT MAX(timestamp_utc) FROM records WHERE records.user_id = users.user_id)
+                AS last_record_time
             FROM users
             WHERE user_id = ?;
             """,
@@ -62,65 +120,79 @@ class UserRepository:
         )
         if row is None:
             return None
-        return UserProfile(
-            user_id=int(row["user_id"]),
-            nickname=row["nickname"],
-            timezone=row["timezone"],
-            height_cm=row["height_cm"],
-            weight_kg=row["weight_kg"],
-            birthday=row["birthday"],
-            created_at_utc=datetime.fromisoformat(row["created_at_utc"]),
-            updated_at_utc=datetime.fromisoformat(row["updated_at_utc"]),
+        profile = _profile_from_row(row)
+        self._profiles.set(user_id, profile, generation)
+        last_record_time = row["last_record_time"]
+        return ProfileSummary(
+            profile=profile,
+            total_records=int(row["total_records"]),
+            last_record_utc=from_epoch(last_record_time) if last_record_time else None,
         )
 
-    def update_nickname(self, user_id: int, nickname: str, now_utc: datetime) -> None:
-        now_iso = now_utc.isoformat()
+    def update_nickname(self, user_id: int, nickname: str) -> None:
         self._db.execute(
-            """
+            f"""
             UPDATE users
-            SET nickname = ?, updated_at_utc = ?
+            SET nickname = ?, updated_at_utc = {_NOW_SQL}
             WHERE user_id = ?;
             """,
-            (nickname, now_iso, user_id),
+            (nickname, user_id),
         )
+        self._profiles.pop(user_id)
 
-    def update_height_cm(self, user_id: int, height_cm: int, now_utc: datetime) -> None:
-        now_iso = now_utc.isoformat()
+    def update_height_cm(self, user_id: int, height_cm: int) -> None:
         self._db.execute(
-            """
+            f"""
             UPDATE users
-            SET height_cm = ?, updated_at_utc = ?
+            SET height_cm = ?, updated_at_utc = {_NOW_SQL}
             WHERE user_id = ?;
             """,
-            (height_cm, now_iso, user_id),
+            (height_cm, user_id),
         )
+        self._profiles.pop(user_id)
 
-    def update_weight_kg(self, user_id: int, weight_kg: float, now_utc: datetime) -> None:
-        now_iso = now_utc.isoformat()
+    def update_weight_kg(self, user_id: int, weight_kg: float) -> None:
         self._db.execute(
-            """
+            f"""
             UPDATE users
-            SET weight_kg = ?, updated_at_utc = ?
+            SET weight_kg = ?, updated_at_utc = {_NOW_SQL}
             WHERE user_id = ?;
             """,
-            (weight_kg, now_iso, user_id),
+            (weight_kg, user_id),
         )
+        self._profiles.pop(user_id)
 
-    def update_birthday(self, user_id: int, birthday: str, now_utc: datetime) -> None:
-        now_iso = now_utc.isoformat()
+    def update_birthday(self, user_id: int, birthday: str) -> None:
         self._db.execute(
-            """
+            f"""
             UPDATE users
-            SET birthday = ?, updated_at_utc = ?
+            SET birthday = ?, updated_at_utc = {_NOW_SQL}
             WHERE user_id = ?;
             """,
-            (birthday, now_iso, user_id),
+            (birthday, user_id),
         )
+        self._profiles.pop(user_id)
+
+
+def _profile_from_row(row: sqlite3.Row) -> UserProfile:
+    return UserProfile(
+        user_id=int(row["user_id"]),
+        nickname=row["nickname"],
+        timezone=row["timezone"],
+        height_cm=row["height_cm"],
+        weight_kg=row["weight_kg"],
+        birthday=row["birthday"],
+        created_at_utc=row["created_at_utc"],
+        updated_at_utc=row["updated_at_utc"],
+    )
 
 
 class RecordRepository:
     def __init__(self, db: Database) -> None:
         self._db = db
+        self._totals: TTLCache[int, tuple[int, datetime | None]] = TTLCache(
+            maxsize=4096, ttl=30
+        )
 
     def insert_record(
         self,
@@ -129,13 +201,12 @@ class RecordRepository:
         timezone: str,
         timestamp_local: datetime,
         rating: int,
-        duration_code: str,
-        volume_code: str,
-        viscosity_code: str,
-        created_at_utc: datetime,
+        duration_code: DurationCode,
+        volume_code: VolumeCode,
+        viscosity_code: ViscosityCode,
     ) -> int:
         cur = self._db.execute(
-            """
+            f"""
             INSERT INTO records (
               user_id,
               timestamp_utc,
@@ -147,20 +218,20 @@ class RecordRepository:
               viscosity_code,
               created_at_utc
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, {_NOW_SQL});
             """,
             (
                 user_id,
-                timestamp_utc.isoformat(),
+                to_epoch(timestamp_utc),
                 timezone,
-                timestamp_local.isoformat(),
+                timestamp_local,
                 rating,
-                duration_code,
-                volume_code,
-                viscosity_code,
-                created_at_utc.isoformat(),
+                DURATION_CODE_IDS[duration_code],
+                VOLUME_CODE_IDS[volume_code],
+                VISCOSITY_CODE_IDS[viscosity_code],
             ),
         )
+        self._invalidate_stats(user_id)
         record_id = cur.lastrowid
         if record_id is None:
             raise RuntimeError("Failed to obtain record id after insert.")
@@ -171,52 +242,52 @@ class RecordRepository:
             "DELETE FROM records WHERE id = ? AND user_id = ?;",
             (record_id, user_id),
         )
+        self._invalidate_stats(user_id)
         return cur.rowcount > 0
 
-    def list_records_in_range(
+    def summarize_range(
         self, user_id: int, start_utc: datetime, end_utc: datetime
-    ) -> list[dict[str, str]]:
+    ) -> RangeSummary:
         rows = self._db.fetchall(
             """
-            SELECT timestamp_utc, timestamp_local
+            SELECT
+              CAST(substr(timestamp_local, 12, 2) AS INTEGER) AS hour,
+              COUNT(*) AS cnt,
+              MIN(timestamp_utc) AS first_time,
+              MAX(timestamp_utc) AS last_time
             FROM records
             WHERE user_id = ?
               AND timestamp_utc BETWEEN ? AND ?
-            ORDER BY timestamp_utc ASC;
-            """,
-            (user_id, start_utc.isoformat(), end_utc.isoformat()),
-        )
-        return [dict(row) for row in rows]
-
-    def get_first_record_time(self, user_id: int) -> datetime | None:
-        row = self._db.fetchone(
-            """
-            SELECT MIN(timestamp_utc) AS first_time
-            FROM records WHERE user_id = ?;
+            GROUP BY hour;
             """,
-            (user_id,),
+            (user_id, to_epoch(start_utc), to_epoch(end_utc)),
         )
-        if row and row["first_time"]:
-            return datetime.fromisoformat(row["first_time"])
-        return None
-
-    def count_all_records(self, user_id: int) -> int:
-        row = self._db.fetchone(
-            "SELECT COUNT(*) AS cnt FROM records WHERE user_id = ?;",
-            (user_id,),
+        if not rows:
+            return RangeSummary(total=0, first_utc=None, last_utc=None, hour_counts={})
+        return RangeSummary(
+            total=sum(row["cnt"] for row in rows),
+            first_utc=from_epoch(min(row["first_time"] for row in rows)),
+            last_utc=from_epoch(max(row["last_time"] for row in rows)),
+            hour_counts={row["hour"]: row["cnt"] for row in rows},
         )
-        if row is None or row["cnt"] is None:
-            return 0
-        return int(row["cnt"])
 
-    def get_last_record_time(self, user_id: int) -> datetime | None:
+    def get_record_totals(self, user_id: int) -> tuple[int, datetime | None]:
+        totals = self._totals.get(user_id)
+        if totals is not None:
+            return totals
+        generation = self._totals.generation
         row = self._db.fetchone(
             """
-            SELECT MAX(timestamp_utc) AS last_time
+            SELECT COUNT(*) AS cnt, MIN(timestamp_utc) AS first_time
             FROM records WHERE user_id = ?;
             """,
             (user_id,),
         )
-        if row and row["last_time"]:
-            return datetime.fromisoformat(row["last_time"])
-        return None
+        if row is None or not row["cnt"]:
+            return 0, None
+        totals = int(row["cnt"]), from_epoch(row["first_time"])
+        self._totals.set(user_id, totals, generation)
+        return totals
+
+    def _invalidate_stats(self, user_id: int) -> None:
+        self._totals.pop(user_id)
@@ -1,13 +1,15 @@
+from asyncio import Task
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from threading import Lock
-from uuid import uuid4
+from itertools import count
+from secrets import token_hex
 
 from .enums import DurationCode, Step, ViscosityCode, VolumeCode
 from .utils import utc_now
 
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     session_id: str
     user_id: int
@@ -15,47 +17,66 @@ class Session:
     message_id: int
     step: Step
     created_at_utc: datetime = field(default_factory=utc_now)
+    timezone: str | None = None
     rating: int | None = None
     duration_code: DurationCode | None = None
     volume_code: VolumeCode | None = None
     viscosity_code: ViscosityCode | None = None
     finalizing: bool = False
+    edit_task: Task[object] | None = None
 
 
 class SessionManager:
     def __init__(self, ttl: timedelta) -> None:
         self._ttl = ttl
         self._sessions: dict[str, Session] = {}
-        self._lock = Lock()
+        self._expiry_order: deque[tuple[datetime, str]] = deque()
+        self._id_prefix = token_hex(2)
+        self._ids = count(1)
 
-    def create(self, user_id: int, chat_id: int, message_id: int = 0) -> Session:
-        session_id = f"{user_id}_{int(utc_now().timestamp() * 1000)}_{uuid4().hex[:4]}"
+    def create(
+        self,
+        user_id: int,
+        chat_id: int,
+        message_id: int = 0,
+        timezone: str | None = None,
+    ) -> Session:
+        now = utc_now()
+        self._drain_expired(now)
+        session_id = f"{self._id_prefix}{next(self._ids):x}"
         session = Session(
             session_id=session_id,
             user_id=user_id,
             chat_id=chat_id,
             message_id=message_id,
             step=Step.RATING,
+            created_at_utc=now,
+            timezone=timezone,
         )
-        with self._lock:
-            self._sessions[session_id] = session
+        self._sessions[session_id] = session
+        self._expiry_order.append((now + self._ttl, session_id))
         return session
 
     def get(self, session_id: str) -> Session | None:
-        with self._lock:
-            return self._sessions.get(session_id)
+        session = self._sessions.get(session_id)
+        if session is not None and self._is_expired(session, utc_now()):
+            del self._sessions[session_id]
+            return None
+        return session
 
     def remove(self, session_id: str) -> Session | None:
-        with self._lock:
-            return self._sessions.pop(session_id, None)
+        return self._sessions.pop(session_id, None)
 
     def cleanup_expired(self) -> int:
-        now = utc_now()
-        expired: list[str] = []
-        with self._lock:
-            for session_id, session in self._sessions.items():
-                if now - session.created_at_utc > self._ttl:
-                    expired.append(session_id)
-            for session_id in expired:
-                self._sessions.pop(session_id, None)
-        return len(expired)
+        return self._drain_expired(utc_now())
+
+    def _drain_expired(self, now: datetime) -> int:
+        expired = 0
+        while self._expiry_order and self._expiry_order[0][0] < now:
+            _, session_id = self._expiry_order.popleft()
+            if self._sessions.pop(session_id, None) is not None:
+                expired += 1
+        return expired
+
+    def _is_expired(self, session: Session, now: datetime) -> bool:
+        return now - session.created_at_utc > self._ttl
@@ -1,9 +1,9 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
-from .repositories import RecordRepository
+from .repositories import RangeSummary, RecordRepository
 from .ui import bucketize_hours, pick_top_bucket
-from .utils import parse_iso, utc_now
+from .utils import utc_now
 
 
 @dataclass(frozen=True)
@@ -23,23 +23,18 @@ class StatsService:
     def build_summary(self, user_id: int, days: int) -> StatsSummary:
         now = utc_now()
         start = now - timedelta(days=days)
-        entries = self._records.list_records_in_range(user_id, start, now)
-        total = len(entries)
+        window = self._records.summarize_range(user_id, start, now)
 
-        first_record = self._records.get_first_record_time(user_id)
-        avg_week = self._average_rate(first_record, now, 7, user_id)
-        avg_month = self._average_rate(first_record, now, 30, user_id)
+        total_all, first_record = self._records.get_record_totals(user_id)
+        avg_week = self._average_rate(first_record, now, 7, total_all)
+        avg_month = self._average_rate(first_record, now, 30, total_all)
 
-        hours = []
-        for entry in entries:
-            local_dt = parse_iso(entry["timestamp_local"])
-            hours.append(local_dt.hour)
-        bucket_counts = bucketize_hours(hours)
+        bucket_counts = bucketize_hours(window.hour_counts)
         top_bucket = pick_top_bucket(bucket_counts)
 
-        avg_interval, last_ago = self._interval_stats(entries, now)
+        avg_interval, last_ago = self._interval_stats(window, now)
         return StatsSummary(
-            total=total,
+            total=window.total,
             avg_week=avg_week,
             avg_month=avg_month,
             top_bucket=top_bucket,
@@ -52,31 +47,25 @@ class StatsService:
         first_record: datetime | None,
         now: datetime,
         period_days: int,
-        user_id: int,
+        total: int,
     ) -> float | None:
         if not first_record:
             return None
         elapsed = now - first_record
         if elapsed < timedelta(days=period_days):
             return None
-        total = self._records.count_all_records(user_id)
         periods = elapsed / timedelta(days=period_days)
         if periods <= 0:
             return None
         return total / periods
 
     def _interval_stats(
-        self, entries: list[dict[str, str]], now: datetime
+        self, window: RangeSummary, now: datetime
     ) -> tuple[timedelta | None, timedelta | None]:
-        if len(entries) < 2:
-            last_ago = None
-            if entries:
-                last_ago = now - parse_iso(entries[-1]["timestamp_utc"])
+        if window.first_utc is None or window.last_utc is None:
+            return None, None
+        last_ago = now - window.last_utc
+        if window.total < 2:
             return None, last_ago
-        timestamps = [parse_iso(entry["timestamp_utc"]) for entry in entries]
-        diffs = [
-            later - earlier for earlier, later in zip(timestamps, timestamps[1:], strict=False)
-        ]
-        avg_interval = sum(diffs, timedelta()) / len(diffs)
-        last_ago = now - timestamps[-1]
+        avg_interval = (window.last_utc - window.first_utc) / (window.total - 1)
         return avg_interval, last_ago
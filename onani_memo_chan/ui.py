@@ -1,10 +1,11 @@
-from collections.abc import Iterable
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-from .enums import DurationCode, Step, ViscosityCode, VolumeCode
+from .enums import Action, DurationCode, Step, ViscosityCode, VolumeCode
 from .session import Session
 from .timezones import DEFAULT_TIMEZONE_PAGE, TIMEZONE_LABEL_BY_IANA, TIMEZONE_PAGES
 from .utils import format_timedelta
@@ -13,6 +14,14 @@ TIMEZONE_PROMPT = "<b>选择时区</b>\n在下方按钮中选择或取消。"
 PRIVATE_ONLY_TEXT = "仅支持在私聊中使用，请切换到与机器人的私聊窗口。"
 SESSION_EXPIRED_TEXT = "当前记录会话已过期，请重新发送 /do 开始新的记录。"
 SESSION_DONE_TEXT = "这次记录已完成。"
+HELP_TEMPLATE = (
+    "<b>欢迎回来</b>\n"
+    "• 当前时区：{timezone}\n"
+    "• 修改时区：/timezone\n"
+    "• 开始记录：/do\n"
+    "• 我的信息：/me\n"
+    "• 统计：/week /month"
+)
 
 
 @dataclass(frozen=True)
@@ -29,6 +38,14 @@ DURATION_LABELS = {
     DurationCode.GT60: "60 分钟以上",
 }
 
+DURATION_BUTTON_LABELS = {
+    DurationCode.LE5: "<=5m",
+    DurationCode.LE10: "<=10m",
+    DurationCode.LE30: "<=30m",
+    DurationCode.LE60: "<=60m",
+    DurationCode.GT60: ">60m",
+}
+
 VOLUME_LABELS = {
     VolumeCode.LOW: "少",
     VolumeCode.MID: "一般",
@@ -43,6 +60,8 @@ VISCOSITY_LABELS = {
     ViscosityCode.V5: "很稠",
 }
 
+HOUR_BUCKETS = ("深夜(00-06)", "上午(06-12)", "下午(12-18)", "晚上(18-24)")
+
 RATING_LABELS = {
     1: "太垃了",
     2: "不爽",
@@ -52,11 +71,18 @@ RATING_LABELS = {
 }
 
 
+@lru_cache(maxsize=512)
 def format_timezone_label(iana: str) -> str:
     label = TIMEZONE_LABEL_BY_IANA.get(iana, iana)
     return f"{label} ({iana})"
 
 
+@lru_cache(maxsize=512)
+def format_help_message(timezone: str) -> str:
+    return HELP_TEMPLATE.format(timezone=format_timezone_label(timezone))
+
+
+@lru_cache(maxsize=16)
 def build_timezone_keyboard(page: int | None = None) -> InlineKeyboardMarkup:
     page_index = (page or DEFAULT_TIMEZONE_PAGE) - 1
     page_index = max(0, min(page_index, len(TIMEZONE_PAGES) - 1))
@@ -86,90 +112,44 @@ def build_timezone_keyboard(page: int | None = None) -> InlineKeyboardMarkup:
 
 
 def selection_summary(session: Session) -> str:
-    parts: list[str] = []
-    if session.rating is not None:
-        parts.append(f"体验感={RATING_LABELS[session.rating]}")
-    if session.duration_code is not None:
-        parts.append(f"时长={DURATION_LABELS[session.duration_code]}")
-    if session.volume_code is not None:
-        parts.append(f"量={VOLUME_LABELS[session.volume_code]}")
-    if session.viscosity_code is not None:
-        parts.append(f"稠度={VISCOSITY_LABELS[session.viscosity_code]}")
-    return "；".join(parts)
+    rating = session.rating
+    duration_code = session.duration_code
+    volume_code = session.volume_code
+    viscosity_code = session.viscosity_code
+    parts = (
+        f"体验感={RATING_LABELS[rating]}" if rating is not None else "",
+        f"时长={DURATION_LABELS[duration_code]}" if duration_code is not None else "",
+        f"量={VOLUME_LABELS[volume_code]}" if volume_code is not None else "",
+        f"稠度={VISCOSITY_LABELS[viscosity_code]}"
+        if viscosity_code is not None
+        else "",
+    )
+    return "；".join(part for part in parts if part)
 
 
 def build_rating_keyboard(session_id: str) -> InlineKeyboardMarkup:
-    row = [
-        InlineKeyboardButton(RATING_LABELS[value], callback_data=f"r:{session_id}:{value}")
-        for value in range(1, 6)
-    ]
-    cancel = [InlineKeyboardButton("取消记录", callback_data=f"x:{session_id}")]
-    return InlineKeyboardMarkup([row, cancel])
+    return _build_step_keyboard(session_id, Action.RATING, RATING_LABELS)
 
 
 def build_duration_keyboard(session_id: str) -> InlineKeyboardMarkup:
-    row = [
-        InlineKeyboardButton(
-            "<=5m", callback_data=f"d:{session_id}:{DurationCode.LE5.value}"
-        ),
-        InlineKeyboardButton(
-            "<=10m", callback_data=f"d:{session_id}:{DurationCode.LE10.value}"
-        ),
-        InlineKeyboardButton(
-            "<=30m", callback_data=f"d:{session_id}:{DurationCode.LE30.value}"
-        ),
-        InlineKeyboardButton(
-            "<=60m", callback_data=f"d:{session_id}:{DurationCode.LE60.value}"
-        ),
-        InlineKeyboardButton(
-            ">60m", callback_data=f"d:{session_id}:{DurationCode.GT60.value}"
-        ),
-    ]
-    cancel = [InlineKeyboardButton("取消记录", callback_data=f"x:{session_id}")]
-    return InlineKeyboardMarkup([row, cancel])
+    return _build_step_keyboard(session_id, Action.DURATION, DURATION_BUTTON_LABELS)
 
 
 def build_volume_keyboard(session_id: str) -> InlineKeyboardMarkup:
-    row = [
-        InlineKeyboardButton(
-            VOLUME_LABELS[VolumeCode.LOW],
-            callback_data=f"v:{session_id}:{VolumeCode.LOW.value}",
-        ),
-        InlineKeyboardButton(
-            VOLUME_LABELS[VolumeCode.MID],
-            callback_data=f"v:{session_id}:{VolumeCode.MID.value}",
-        ),
-        InlineKeyboardButton(
-            VOLUME_LABELS[VolumeCode.HIGH],
-            callback_data=f"v:{session_id}:{VolumeCode.HIGH.value}",
-        ),
-    ]
-    cancel = [InlineKeyboardButton("取消记录", callback_data=f"x:{session_id}")]
-    return InlineKeyboardMarkup([row, cancel])
+    return _build_step_keyboard(session_id, Action.VOLUME, VOLUME_LABELS)
 
 
 def build_viscosity_keyboard(session_id: str) -> InlineKeyboardMarkup:
+    return _build_step_keyboard(session_id, Action.VISCOSITY, VISCOSITY_LABELS)
+
+
+def _build_step_keyboard(
+    session_id: str, action: Action, labels: Mapping[object, str]
+) -> InlineKeyboardMarkup:
+    prefix = f"{action}:{session_id}:"
     row = [
-        InlineKeyboardButton(
-            VISCOSITY_LABELS[ViscosityCode.V1],
-            callback_data=f"c:{session_id}:{ViscosityCode.V1.value}",
-        ),
-        InlineKeyboardButton(
-            VISCOSITY_LABELS[ViscosityCode.V2],
-            callback_data=f"c:{session_id}:{ViscosityCode.V2.value}",
-        ),
-        InlineKeyboardButton(
-            VISCOSITY_LABELS[ViscosityCode.V3],
-            callback_data=f"c:{session_id}:{ViscosityCode.V3.value}",
-        ),
-        InlineKeyboardButton(
-            VISCOSITY_LABELS[ViscosityCode.V4],
-            callback_data=f"c:{session_id}:{ViscosityCode.V4.value}",
-        ),
-        InlineKeyboardButton(
-            VISCOSITY_LABELS[ViscosityCode.V5],
-            callback_data=f"c:{session_id}:{ViscosityCode.V5.value}",
-        ),
+        InlineKeyboardButton(label, callback_data=f"{prefix}{value}")
+        for value, label in labels.items()
     ]
     cancel = [InlineKeyboardButton("取消记录", callback_data=f"x:{session_id}")]
     return InlineKeyboardMarkup([row, cancel])
@@ -181,12 +161,14 @@ def build_undo_keyboard(session_id: str, record_id: int) -> InlineKeyboardMarkup
     )
 
 
+@lru_cache(maxsize=1)
 def build_profile_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [[InlineKeyboardButton("修改", callback_data="me:edit")]]
     )
 
 
+@lru_cache(maxsize=1)
 def build_profile_edit_keyboard() -> InlineKeyboardMarkup:
     rows = [
         [
@@ -211,30 +193,36 @@ def format_profile_message(
     last_record: str,
     started_at: str,
 ) -> str:
-    lines = [
-        "<b>我的信息</b>",
-        f"• 昵称：{nickname}",
-        f"• 身高：{height}",
-        f"• 体重：{weight}",
-        f"• 生日：{birthday}",
-        f"• 总记录次数：{total_records}",
-        f"• 最后一次利用：{last_record}",
-        f"• 开始利用时间：{started_at}",
-    ]
-    return "\n".join(lines)
+    return (
+        "<b>我的信息</b>\n"
+        f"• 昵称：{nickname}\n"
+        f"• 身高：{height}\n"
+        f"• 体重：{weight}\n"
+        f"• 生日：{birthday}\n"
+        f"• 总记录次数：{total_records}\n"
+        f"• 最后一次利用：{last_record}\n"
+        f"• 开始利用时间：{started_at}"
+    )
+
+
+STEP_VIEWS: dict[Step, tuple[str, Callable[[str], InlineKeyboardMarkup]]] = {
+    Step.RATING: ("<b>体验感</b>\n主人冲爽了吗：", build_rating_keyboard),
+    Step.DURATION: (
+        "<b>时长</b>\n已选：{summary}\n主人冲了多长时间：",
+        build_duration_keyboard,
+    ),
+    Step.VOLUME: ("<b>量</b>\n已选：{summary}\n主人🐍的多吗：", build_volume_keyboard),
+    Step.VISCOSITY: (
+        "<b>稠度</b>\n已选：{summary}\n主人的精液是：",
+        build_viscosity_keyboard,
+    ),
+}
 
 
 def build_step_view(session: Session) -> StepView:
-    if session.step == Step.RATING:
-        return StepView("<b>体验感</b>\n主人冲爽了吗：", build_rating_keyboard(session.session_id))
-    if session.step == Step.DURATION:
-        text = f"<b>时长</b>\n已选：{selection_summary(session)}\n主人冲了多长时间："
-        return StepView(text, build_duration_keyboard(session.session_id))
-    if session.step == Step.VOLUME:
-        text = f"<b>量</b>\n已选：{selection_summary(session)}\n主人🐍的多吗："
-        return StepView(text, build_volume_keyboard(session.session_id))
-    text = f"<b>稠度</b>\n已选：{selection_summary(session)}\n主人的精液是："
-    return StepView(text, build_viscosity_keyboard(session.session_id))
+    template, build_keyboard = STEP_VIEWS[session.step]
+    text = template.format(summary=selection_summary(session))
+    return StepView(text, build_keyboard(session.session_id))
 
 
 def format_record_confirmation(session: Session, timestamp_local: datetime) -> str:
@@ -249,16 +237,14 @@ def format_record_confirmation(session: Session, timestamp_local: datetime) -> s
         or viscosity_code is None
     ):
         raise ValueError("Session is incomplete for confirmation rendering.")
-    local_str = timestamp_local.strftime("%Y-%m-%d %H:%M")
-    lines = [
-        "<b>记录成功</b>",
-        f"• 体验感：{RATING_LABELS[rating]}",
-        f"• 时长：{DURATION_LABELS[duration_code]}",
-        f"• 量：{VOLUME_LABELS[volume_code]}",
-        f"• 稠度：{VISCOSITY_LABELS[viscosity_code]}",
-        f"• 本地时间：{local_str}",
-    ]
-    return "\n".join(lines)
+    return (
+        "<b>记录成功</b>\n"
+        f"• 体验感：{RATING_LABELS[rating]}\n"
+        f"• 时长：{DURATION_LABELS[duration_code]}\n"
+        f"• 量：{VOLUME_LABELS[volume_code]}\n"
+        f"• 稠度：{VISCOSITY_LABELS[viscosity_code]}\n"
+        f"• 本地时间：{timestamp_local:%Y-%m-%d %H:%M}"
+    )
 
 
 def format_stats_message(
@@ -270,42 +256,36 @@ def format_stats_message(
     avg_interval: timedelta | None,
     last_ago: timedelta | None,
 ) -> str:
-    lines = [f"<b>{title}</b>", f"• 总次数：{total}"]
+    text = f"<b>{title}</b>\n• 总次数：{total}"
     if avg_week is not None:
-        lines.append(f"• 平均每周：{avg_week:.1f}")
+        text += f"\n• 平均每周：{avg_week:.1f}"
     if avg_month is not None:
-        lines.append(f"• 平均每月：{avg_month:.1f}")
+        text += f"\n• 平均每月：{avg_month:.1f}"
     if top_bucket:
-        lines.append(f"• 高频时段：{top_bucket}")
+        text += f"\n• 高频时段：{top_bucket}"
     if avg_interval is not None:
-        lines.append(f"• 平均间隔：{format_timedelta(avg_interval)}")
+        text += f"\n• 平均间隔：{format_timedelta(avg_interval)}"
     if last_ago is not None:
-        lines.append(f"• 最近一次：{format_timedelta(last_ago)} 前")
-    return "\n".join(lines)
+        text += f"\n• 最近一次：{format_timedelta(last_ago)} 前"
+    return text
 
 
 def pick_top_bucket(bucket_counts: dict[str, int]) -> str | None:
-    if not bucket_counts:
-        return None
-    max_count = max(bucket_counts.values())
-    top = [name for name, count in bucket_counts.items() if count == max_count]
-    return " / ".join(top)
-
-
-def bucketize_hours(hours: Iterable[int]) -> dict[str, int]:
-    buckets = {
-        "深夜(00-06)": 0,
-        "上午(06-12)": 0,
-        "下午(12-18)": 0,
-        "晚上(18-24)": 0,
+    top: list[str] = []
+    max_count = 0
+    for name, count in bucket_counts.items():
+        if count > max_count:
+            max_count = count
+            top = [name]
+        elif count == max_count:
+            top.append(name)
+    return " / ".join(top) if top else None
+
+
+def bucketize_hours(hour_counts: Mapping[int, int]) -> dict[str, int]:
+    counts = [0] * len(HOUR_BUCKETS)
+    for hour, count in hour_counts.items():
+        counts[hour // 6] += count
+    return {
+        name: count for name, count in zip(HOUR_BUCKETS, counts, strict=True) if count
     }
-    for hour in hours:
-        if 0 <= hour < 6:
-            buckets["深夜(00-06)"] += 1
-        elif 6 <= hour < 12:
-            buckets["上午(06-12)"] += 1
-        elif 12 <= hour < 18:
-            buckets["下午(12-18)"] += 1
-        else:
-            buckets["晚上(18-24)"] += 1
-    return {name: count for name, count in buckets.items() if count}
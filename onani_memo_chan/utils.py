@@ -1,29 +1,32 @@
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 
 
 def utc_now() -> datetime:
     return datetime.now(UTC)
 
 
-def to_iso(dt: datetime) -> str:
-    return dt.isoformat()
+def to_epoch(dt: datetime) -> int:
+    return int(dt.timestamp())
 
 
-def parse_iso(value: str) -> datetime:
-    return datetime.fromisoformat(value)
+def from_epoch(value: int) -> datetime:
+    return datetime.fromtimestamp(value, UTC)
+
+
+@lru_cache(maxsize=512)
+def get_zoneinfo(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
 
 
 def format_timedelta(delta: timedelta) -> str:
-    total_seconds = int(delta.total_seconds())
-    if total_seconds < 0:
-        total_seconds = 0
-    minutes, _ = divmod(total_seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-    days, hours = divmod(hours, 24)
-    parts: list[str] = []
+    total_seconds = max(int(delta.total_seconds()), 0)
+    days = total_seconds // 86400
+    hours = total_seconds // 3600 % 24
+    minutes = total_seconds // 60 % 60
     if days:
-        parts.append(f"{days}d")
-    if hours or parts:
-        parts.append(f"{hours}h")
-    parts.append(f"{minutes}m")
-    return " ".join(parts)
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
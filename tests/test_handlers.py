@@ -0,0 +1,61 @@
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+
+from onani_memo_chan.enums import Step
+from onani_memo_chan.handlers import callback
+from onani_memo_chan.services import Services
+from onani_memo_chan.session import SessionManager
+
+OWNER_ID = 42
+STRANGER_ID = 777
+
+
+class FakeQuery:
+    def __init__(self, data: str, user_id: int) -> None:
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.answers: list[str | None] = []
+        self.edits: list[str] = []
+
+    async def answer(self, text: str | None = None, show_alert: bool = False) -> None:
+        self.answers.append(text)
+
+    async def edit_message_text(self, text: str, **kwargs: object) -> None:
+        self.edits.append(text)
+
+
+class CrossUserCallbackTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.sessions = SessionManager(timedelta(minutes=30))
+        self.services = Services(
+            users=None, records=None, sessions=self.sessions, stats=None
+        )
+        self.session = self.sessions.create(OWNER_ID, OWNER_ID, timezone="UTC")
+
+    async def _tap(self, data: str, user_id: int) -> FakeQuery:
+        query = FakeQuery(data, user_id)
+        update = SimpleNamespace(callback_query=query)
+        context = SimpleNamespace(user_data={})
+        await callback(update, context, services=self.services)
+        return query
+
+    async def test_stranger_cannot_advance_session(self) -> None:
+        query = await self._tap(f"r:{self.session.session_id}:5", STRANGER_ID)
+        self.assertEqual(query.edits, [])
+        self.assertIsNone(self.session.rating)
+        self.assertEqual(self.session.step, Step.RATING)
+
+    async def test_stranger_cannot_cancel_session(self) -> None:
+        query = await self._tap(f"x:{self.session.session_id}", STRANGER_ID)
+        self.assertEqual(query.edits, [])
+        self.assertIs(self.sessions.get(self.session.session_id), self.session)
+
+    async def test_owner_can_cancel_session(self) -> None:
+        query = await self._tap(f"x:{self.session.session_id}", OWNER_ID)
+        self.assertEqual(len(query.edits), 1)
+        self.assertIsNone(self.sessions.get(self.session.session_id))
+
+
+if __name__ == "__main__":
+    unittest.main()